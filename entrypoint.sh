@@ -51,6 +51,10 @@ if [ -n "$REJECT_LOG_FILE" ]; then
     ARGS+=("--reject-log" "$REJECT_LOG_FILE")
 fi
 
+if [ -n "$DECRYPT_WORKERS" ]; then
+    ARGS+=("--decrypt-workers" "$DECRYPT_WORKERS")
+fi
+
 # Parse comma-separated channel keys
 if [ -n "$CHANNEL_KEYS" ]; then
     IFS=',' read -ra KEYS <<< "$CHANNEL_KEYS"
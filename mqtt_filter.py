@@ -5,27 +5,101 @@ Filters Meshtastic MQTT messages based on 'Ok to MQTT' flag
 """
 
 import argparse
+import array
 import base64
 import hashlib
 import logging
+import operator
+import struct
 import sys
+import threading
 import time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
-from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 import paho.mqtt.client as mqtt
 from meshtastic.protobuf import mesh_pb2, mqtt_pb2, portnums_pb2, telemetry_pb2
 
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the date and time at most once per second.
+
+    Output matches logging.Formatter's default asctime
+    ("YYYY-mm-dd HH:MM:SS,mmm"), but strftime only runs when the second
+    changes instead of for every record.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, formatted date and time), replaced as one tuple so it is thread-safe
+        self._cached_time = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, formatted = self._cached_time
+        if second != cached_second:
+            formatted = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_time = (second, formatted)
+        return self.default_msec_format % (formatted, record.msecs)
+
+
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    handlers=[_log_handler]
 )
 logger = logging.getLogger(__name__)
 
 # Default Meshtastic LongFast channel key (base64)
 DEFAULT_KEY_B64 = "1PG7OiApB1nwvP+rz05pAQ=="
 
+# Topic segments that sit where the channel name would be but are not channels
+NON_CHANNEL_TOPIC_SEGMENTS = frozenset({"e", "c"})
+
+# Upper bound on cached (key, channel) derived keys; channel names come from
+# topics, so the cache is cleared rather than allowed to grow without limit
+DERIVED_KEY_CACHE_SIZE = 256
+
+# Decrypt jobs allowed in flight (queued or running) per worker thread; when
+# all are taken, messages are decrypted inline on the MQTT network thread
+DECRYPT_QUEUE_PER_WORKER = 4
+
+# Statistics counters, kept in one array indexed by the STAT_* constants
+STAT_NAMES = (
+    'total',
+    'forwarded',
+    'rejected_encrypted',
+    'rejected_no_bitfield',
+    'rejected_bitfield_disabled',
+    'decrypted',
+    'decryption_failed',
+)
+(
+    STAT_TOTAL,
+    STAT_FORWARDED,
+    STAT_REJECTED_ENCRYPTED,
+    STAT_REJECTED_NO_BITFIELD,
+    STAT_REJECTED_BITFIELD_DISABLED,
+    STAT_DECRYPTED,
+    STAT_DECRYPTION_FAILED,
+) = range(len(STAT_NAMES))
+
+# MeshPacket.from is a Python keyword, so it is read through a getter
+_get_from = operator.attrgetter('from')
+
+# AES-CTR nonce: packet_id (8 bytes LE) + sender_id (8 bytes LE)
+_pack_nonce = struct.Struct('<QQ').pack
+
+# Protobuf tag of Data.portnum (field 1, varint), the first byte of any
+# correctly decrypted payload
+DATA_PORTNUM_TAG = 0x08
+# Shortest possible encoded Data with a portnum: the tag plus a one-byte varint
+MIN_DATA_LENGTH = 2
+
 
 class MeshtasticMQTTFilter:
     def __init__(
@@ -41,12 +115,17 @@ class MeshtasticMQTTFilter:
         decrypt_default: bool = True,
         channel_keys: Optional[List[str]] = None,
         reject_log_file: Optional[str] = None,
-        allow_no_bitfield: bool = False
+        allow_no_bitfield: bool = False,
+        decrypt_workers: int = 0
     ):
         self.broker = broker
         self.port = port
         self.input_topic = input_topic
         self.output_topic = output_topic
+        # Topic prefixes used to map forwarded messages onto the output topic
+        self._input_prefix = input_topic.rstrip('/#')
+        self._output_prefix = output_topic.rstrip('/#')
+        self._input_prefix_len = len(self._input_prefix)
         self.username = username
         self.password = password
         self.show_stats = show_stats
@@ -64,40 +143,71 @@ class MeshtasticMQTTFilter:
             fh = logging.FileHandler(reject_log_file)
             fh.setLevel(logging.INFO)
             # Create formatter
-            formatter = logging.Formatter('%(asctime)s - %(message)s')
+            formatter = CachedTimeFormatter('%(asctime)s - %(message)s')
             fh.setFormatter(formatter)
             self.reject_logger.addHandler(fh)
             # Don't propagate to root logger
             self.reject_logger.propagate = False
             logger.info(f"Reject logging enabled: {reject_log_file}")
 
-        # Encryption keys (stored as base64 strings, decoded at decryption time)
-        self.keys = []
+        # Encryption keys, decoded once and stored as parallel (names, key bytes)
+        # tuples so the decrypt loop indexes raw keys directly (see keys property)
+        key_names = []
+        key_bytes = []
         if decrypt_default:
-            self.keys.append(('default', DEFAULT_KEY_B64))
+            key_names.append('default')
+            key_bytes.append(base64.b64decode(DEFAULT_KEY_B64))
             logger.info("Encryption: Using default LongFast key")
 
         if channel_keys:
             for i, key_b64 in enumerate(channel_keys):
                 try:
-                    base64.b64decode(key_b64)  # validate
-                    self.keys.append((f'custom-{i}', key_b64))
+                    key = base64.b64decode(key_b64)
+                    key_names.append(f'custom-{i}')
+                    key_bytes.append(key)
                     logger.info(f"Encryption: Added custom key #{i}")
                 except Exception as e:
                     logger.error(f"Failed to decode custom key #{i}: {e}")
+        self._key_table = (tuple(key_names), tuple(key_bytes))
+
+        # Derived AES keys, keyed by (base key bytes, channel name)
+        self._derived_key_cache = {}
 
-        # Statistics tracking
-        self.stats = {
-            'total': 0,
-            'forwarded': 0,
-            'rejected_encrypted': 0,
-            'rejected_no_bitfield': 0,
-            'rejected_bitfield_disabled': 0,
-            'decrypted': 0,
-            'decryption_failed': 0
-        }
+        # Statistics tracking (unsigned 64-bit counters; see the stats property)
+        self._stats = array.array('Q', [0] * len(STAT_NAMES))
         self.last_stats_time = time.time()
 
+        # Bitfield check outcome, indexed by (has_bitfield << 1) | (bitfield & 0x01):
+        # (forward, rejection counter, reject log reason, debug label)
+        if allow_no_bitfield:
+            no_bitfield = (True, None, None, "no bitfield (allow_no_bitfield=True)")
+        else:
+            no_bitfield = (False, STAT_REJECTED_NO_BITFIELD, "No bitfield present (firmware < 2.5)", "no bitfield")
+        self._bitfield_outcomes = (
+            no_bitfield,
+            no_bitfield,
+            (False, STAT_REJECTED_BITFIELD_DISABLED, "Bitfield bit 0 (Ok to MQTT) not set", "bitfield disabled"),
+            (True, None, None, None),
+        )
+
+        # Envelope reused for every message; on_message runs one message at a time
+        self._envelope_scratch = mqtt_pb2.ServiceEnvelope()
+
+        # Guards the counters and key order, which decrypt workers also update
+        self._stats_lock = threading.Lock()
+
+        # Optional worker pool so decryption does not block paho's network thread
+        # The executor's own queue is unbounded, so a semaphore caps the jobs
+        # in flight to keep memory and latency bounded under bursts
+        self._decrypt_pool = None
+        self._decrypt_slots = None
+        if decrypt_workers > 0:
+            self._decrypt_pool = ThreadPoolExecutor(
+                max_workers=decrypt_workers, thread_name_prefix='decrypt'
+            )
+            self._decrypt_slots = threading.BoundedSemaphore(decrypt_workers * DECRYPT_QUEUE_PER_WORKER)
+            logger.info(f"Decryption: Using {decrypt_workers} worker thread(s)")
+
         self.client = mqtt.Client(client_id=client_id)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
@@ -122,21 +232,41 @@ class MeshtasticMQTTFilter:
 
     def on_message(self, client, userdata, msg):
         try:
-            # Increment total message counter
-            self.stats['total'] += 1
-            msg_num = self.stats['total']
+            output_topic = self._process_message(client, msg)
+            # Publish outside the lock; paho takes its own locks while publishing
+            if output_topic is not None:
+                client.publish(output_topic, msg.payload)
 
-            # Parse the Meshtastic ServiceEnvelope
-            envelope = mqtt_pb2.ServiceEnvelope()
-            envelope.ParseFromString(msg.payload)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
 
-            # Check if the message has the 'Ok to MQTT' flag set
-            # In Meshtastic, this is the PKI_ENCRYPTED flag or channel_id indicating public channel
-            packet = envelope.packet
+    def _process_message(self, client, msg) -> Optional[str]:
+        """Filter one MQTT message.
+
+        Returns the output topic if the message should be published, or None
+        if it was rejected or handed off to a decrypt worker.
+        """
+        # Increment total message counter; only the network thread writes it,
+        # so it needs no lock
+        self._stats[STAT_TOTAL] += 1
+        msg_num = self._stats[STAT_TOTAL]
+
+        # Debug messages are only formatted when debug logging is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        # Parse the Meshtastic ServiceEnvelope into the reused instance
+        # (ParseFromString clears it first); only this thread touches it
+        envelope = self._envelope_scratch
+        envelope.ParseFromString(msg.payload)
 
-            # Debug logging: log full message details
-            from_id = getattr(packet, 'from', 0)
-            to_id = getattr(packet, 'to', 0)
+        # Check if the message has the 'Ok to MQTT' flag set
+        # In Meshtastic, this is the PKI_ENCRYPTED flag or channel_id indicating public channel
+        packet = envelope.packet
+
+        # Debug logging: log full message details
+        if debug:
+            from_id = _get_from(packet)
+            to_id = packet.to
 
             logger.debug("=" * 80)
             logger.debug(f"Message #{msg_num}")
@@ -151,54 +281,130 @@ class MeshtasticMQTTFilter:
             else:
                 logger.debug("Decoded: NOT PRESENT (encrypted)")
 
-            # Try to decrypt if packet is encrypted
-            if packet.decoded.portnum == portnums_pb2.PortNum.UNKNOWN_APP and packet.encrypted:
-                logger.debug(f"Packet has encrypted data, attempting decryption with {len(self.keys)} key(s)")
-                if self.keys:
-                    decrypted = self._attempt_decryption(packet, msg.topic)
-                    if decrypted:
-                        logger.debug(f"Decrypted packet from 0x{from_id:08x}")
-                    else:
-                        logger.debug(f"Failed to decrypt packet from 0x{from_id:08x}")
-                else:
-                    logger.debug("No decryption keys available")
-
-            # Check if message should be forwarded to MQTT
-            # Messages are ok to MQTT if they're on a public channel (channel_id == 0 or PKI_ENCRYPTED not set)
-            # Or if they explicitly have want_response which indicates public sharing
-            is_ok_to_mqtt = self._check_ok_to_mqtt(envelope, packet, msg.topic)
-
-            if is_ok_to_mqtt:
-                self.stats['forwarded'] += 1
-                logger.debug(f"FORWARD: 0x{from_id:08x} -> {envelope.channel_id}")
-                # Publish the original payload to output topic
-                # Replace the input topic prefix with output topic prefix
-                output_topic = msg.topic.replace(self.input_topic.rstrip('/#'), self.output_topic.rstrip('/#'), 1)
+        # Try to decrypt if packet is encrypted; decoded and encrypted share a
+        # oneof, so encrypted bytes mean there is no decoded data
+        decrypt_attempted = False
+        key_name = None
+        if packet.encrypted:
+            if debug:
+                logger.debug(f"Packet has encrypted data, attempting decryption with {len(self._key_table[0])} key(s)")
+            if self._key_table[0]:
+                if self._decrypt_pool is not None and self._decrypt_slots.acquire(blocking=False):
+                    # The worker takes ownership of this envelope
+                    self._envelope_scratch = mqtt_pb2.ServiceEnvelope()
+                    try:
+                        self._decrypt_pool.submit(self._decrypt_and_forward, client, msg, envelope, msg_num)
+                    except Exception:
+                        self._decrypt_slots.release()
+                        raise
+                    return None
+                # No workers, or every decrypt slot is taken: decrypt inline,
+                # outside the lock like the workers do
+                key_name = self._decrypt(packet, msg.topic)
+                decrypt_attempted = True
+            elif debug:
+                logger.debug("No decryption keys available")
+
+        # Without workers nothing else touches the counters or key order
+        if self._decrypt_pool is None:
+            return self._complete_packet(msg, envelope, msg_num, decrypt_attempted, key_name)
+        with self._stats_lock:
+            return self._complete_packet(msg, envelope, msg_num, decrypt_attempted, key_name)
+
+    def _decrypt_and_forward(self, client, msg, envelope, msg_num: int):
+        """Decrypt worker job: decrypt a packet, then filter and publish it."""
+        try:
+            packet = envelope.packet
+            # Decryption only touches this packet, so it runs without the lock
+            key_name = self._decrypt(packet, msg.topic)
+            with self._stats_lock:
+                output_topic = self._complete_packet(msg, envelope, msg_num, True, key_name)
+            if output_topic is not None:
                 client.publish(output_topic, msg.payload)
+
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+        finally:
+            self._decrypt_slots.release()
+
+    def _complete_packet(self, msg, envelope, msg_num: int, decrypt_attempted: bool,
+                         key_name: Optional[str]) -> Optional[str]:
+        """Record the decryption attempt, if any, then filter the packet.
+
+        Updates shared counters and key order, so callers hold the lock when
+        decrypt workers are running.
+        """
+        if decrypt_attempted:
+            self._log_decryption_result(self._record_decryption(key_name), envelope.packet)
+        return self._filter_packet(msg, envelope, msg_num)
+
+    @staticmethod
+    def _log_decryption_result(decrypted: bool, packet):
+        if logger.isEnabledFor(logging.DEBUG):
+            from_id = _get_from(packet)
+            if decrypted:
+                logger.debug(f"Decrypted packet from 0x{from_id:08x}")
             else:
-                logger.debug(f"DISCARD: 0x{from_id:08x} (no ok_to_mqtt)")
+                logger.debug(f"Failed to decrypt packet from 0x{from_id:08x}")
 
-            # Print periodic statistics every 10 messages
-            if msg_num % 10 == 0:
-                self._print_stats()
+    def _filter_packet(self, msg, envelope, msg_num: int) -> Optional[str]:
+        """Apply the 'Ok to MQTT' check to a parsed (and possibly decrypted) packet.
 
-            # Print timed statistics if show_stats is enabled
-            if self.show_stats:
-                current_time = time.time()
-                if current_time - self.last_stats_time >= 30:
-                    self._print_stats()
-                    self.last_stats_time = current_time
+        Returns the output topic to publish to, or None if the packet is rejected.
+        """
+        packet = envelope.packet
+        debug = logger.isEnabledFor(logging.DEBUG)
+        from_id = _get_from(packet) if debug else 0
+        output_topic = None
+
+        # Check if message should be forwarded to MQTT
+        # Messages are ok to MQTT if they're on a public channel (channel_id == 0 or PKI_ENCRYPTED not set)
+        # Or if they explicitly have want_response which indicates public sharing
+        is_ok_to_mqtt = self._check_ok_to_mqtt(envelope, packet, msg.topic)
+
+        if is_ok_to_mqtt:
+            self._stats[STAT_FORWARDED] += 1
+            if debug:
+                logger.debug(f"FORWARD: 0x{from_id:08x} -> {envelope.channel_id}")
+            # Publish the original payload to output topic
+            # Replace the input topic prefix with output topic prefix
+            topic = msg.topic
+            if topic.startswith(self._input_prefix):
+                output_topic = self._output_prefix + topic[self._input_prefix_len:]
+            else:
+                output_topic = topic
+        elif debug:
+            logger.debug(f"DISCARD: 0x{from_id:08x} (no ok_to_mqtt)")
+
+        self._report_stats(msg_num)
+        return output_topic
+
+    def _report_stats(self, msg_num: int):
+        """Print statistics every 10 messages, and every 30 seconds with show_stats"""
+        # Print periodic statistics every 10 messages
+        if msg_num % 10 == 0:
+            self._print_stats()
+
+        # Print timed statistics if show_stats is enabled
+        if self.show_stats:
+            current_time = time.time()
+            if current_time - self.last_stats_time >= 30:
+                self._print_stats()
+                self.last_stats_time = current_time
 
-        except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
+    @property
+    def stats(self) -> dict:
+        """Snapshot of the message counters, keyed by statistic name"""
+        return dict(zip(STAT_NAMES, self._stats))
 
     def _print_stats(self):
         """Print statistics summary"""
-        total = self.stats['total']
+        stats = self.stats
+        total = stats['total']
         if total == 0:
             return
 
-        forwarded = self.stats['forwarded']
+        forwarded = stats['forwarded']
         rejected = total - forwarded
 
         logger.info("=" * 60)
@@ -206,13 +412,13 @@ class MeshtasticMQTTFilter:
         logger.info(f"  Total messages: {total}")
         logger.info(f"  Forwarded: {forwarded} ({100*forwarded/total:.1f}%)")
         logger.info(f"  Rejected: {rejected} ({100*rejected/total:.1f}%)")
-        if self.stats['decrypted'] > 0:
-            logger.info(f"  Decrypted: {self.stats['decrypted']}")
-            logger.info(f"  Decryption failed: {self.stats['decryption_failed']}")
+        if stats['decrypted'] > 0:
+            logger.info(f"  Decrypted: {stats['decrypted']}")
+            logger.info(f"  Decryption failed: {stats['decryption_failed']}")
         logger.info("  Rejection reasons:")
-        logger.info(f"    - Encrypted (no decoded data): {self.stats['rejected_encrypted']}")
-        logger.info(f"    - No bitfield (older firmware): {self.stats['rejected_no_bitfield']}")
-        logger.info(f"    - Bitfield disabled by user: {self.stats['rejected_bitfield_disabled']}")
+        logger.info(f"    - Encrypted (no decoded data): {stats['rejected_encrypted']}")
+        logger.info(f"    - No bitfield (older firmware): {stats['rejected_no_bitfield']}")
+        logger.info(f"    - Bitfield disabled by user: {stats['rejected_bitfield_disabled']}")
         logger.info("=" * 60)
 
     @staticmethod
@@ -225,22 +431,21 @@ class MeshtasticMQTTFilter:
             parts = topic.split("/")
             if len(parts) >= 5:
                 candidate = parts[4]
-                if candidate not in ("e", "c") and not candidate.startswith("!"):
+                if candidate not in NON_CHANNEL_TOPIC_SEGMENTS and not candidate.startswith("!"):
                     return candidate
         except Exception:
             pass
         return ""
 
     @staticmethod
-    def _derive_key(key_base64: str, channel_name: str) -> bytes:
-        """Derive encryption key from channel name and base64 key.
+    def _derive_key(key_bytes: bytes, channel_name: str) -> bytes:
+        """Derive encryption key from channel name and base key.
 
         Follows Meshtastic's key derivation:
         - Named channels: SHA256(key_bytes + channel_name_bytes)
         - Primary channel (empty name): raw key bytes
         """
         try:
-            key_bytes = base64.b64decode(key_base64)
             if channel_name:
                 hasher = hashlib.sha256()
                 hasher.update(key_bytes)
@@ -251,44 +456,49 @@ class MeshtasticMQTTFilter:
             logger.warning(f"Error deriving key: {e}")
             return b"\x00" * 32
 
+    def _get_key(self, key_bytes: bytes, channel_name: str) -> bytes:
+        """Return the derived key for a base key and channel, computing it once."""
+        cache_key = (key_bytes, channel_name)
+        key = self._derived_key_cache.get(cache_key)
+        if key is None:
+            if len(self._derived_key_cache) >= DERIVED_KEY_CACHE_SIZE:
+                self._derived_key_cache.clear()
+            key = self._derive_key(key_bytes, channel_name)
+            self._derived_key_cache[cache_key] = key
+        return key
+
     @staticmethod
-    def _decrypt_payload(encrypted_payload: bytes, packet_id: int, sender_id: int, key: bytes) -> bytes:
-        """Decrypt a Meshtastic packet payload using AES-CTR.
+    def _ctr_decryptor(key: bytes, nonce: bytes):
+        """Create an AES-CTR decryptor for a key and nonce.
 
-        Returns decrypted bytes, or empty bytes on failure.
+        Returns a function that decrypts successive chunks of one payload,
+        continuing the keystream between calls.
         """
-        try:
-            if not encrypted_payload:
-                return b""
-            nonce = packet_id.to_bytes(8, byteorder='little') + sender_id.to_bytes(8, byteorder='little')
-            cipher = Cipher(algorithms.AES(key), modes.CTR(nonce), backend=default_backend())
-            decryptor = cipher.decryptor()
-            return decryptor.update(encrypted_payload) + decryptor.finalize()
-        except Exception as e:
-            logger.debug(f"Decryption failed: {e}")
-            return b""
+        # CTR is a stream mode: update() returns every byte and finalize() adds nothing
+        return Cipher(algorithms.AES(key), modes.CTR(nonce)).decryptor().update
 
-    def _try_decrypt_with_key(self, packet, key_base64: str, channel_name: str = "") -> bool:
-        """Try to decrypt a packet with a single key and channel name.
+    def _try_decrypt_with_key(self, packet, encrypted_payload: bytes, nonce: bytes,
+                              key: bytes) -> bool:
+        """Try to decrypt a packet with a single AES key.
 
         Matches the pattern from mesh-mqtt-pg-collector/malla.
         """
-        # Already decoded?
-        if packet.decoded.portnum != portnums_pb2.PortNum.UNKNOWN_APP:
-            return False
-        if not packet.encrypted:
-            return False
-
-        encrypted_payload = packet.encrypted
-        packet_id = packet.id
-        sender_id = getattr(packet, 'from', 0)
-
-        key = self._derive_key(key_base64, channel_name)
-        decrypted_payload = self._decrypt_payload(encrypted_payload, packet_id, sender_id, key)
-        if not decrypted_payload:
+        try:
+            decrypt = self._ctr_decryptor(key, nonce)
+            # Probe the first two bytes before decrypting the rest. A Data
+            # message with a known portnum starts with the portnum tag
+            # followed by a non-zero varint; anything else is a wrong key
+            head = decrypt(encrypted_payload[:2])
+            if head[0] != DATA_PORTNUM_TAG or head[1] == 0:
+                return False
+            decrypted_payload = head + decrypt(encrypted_payload[2:])
+        except Exception as e:
+            logger.debug("Decryption failed: %s", e)
             return False
 
         try:
+            # Only payloads that pass the check above get this far, so this
+            # allocation happens about once per decrypted packet
             decoded_data = mesh_pb2.Data()
             decoded_data.ParseFromString(decrypted_payload)
 
@@ -297,48 +507,96 @@ class MeshtasticMQTTFilter:
 
             packet.decoded.CopyFrom(decoded_data)
 
-            portnum_name = portnums_pb2.PortNum.Name(decoded_data.portnum)
-            logger.debug(f"Decrypted packet {packet_id} from 0x{sender_id:08x}: {portnum_name}")
+            if logger.isEnabledFor(logging.DEBUG):
+                portnum_name = portnums_pb2.PortNum.Name(decoded_data.portnum)
+                sender_id = _get_from(packet)
+                logger.debug(f"Decrypted packet {packet.id} from 0x{sender_id:08x}: {portnum_name}")
             return True
         except Exception as e:
-            logger.debug(f"Failed to parse decrypted payload: {e}")
+            logger.debug("Failed to parse decrypted payload: %s", e)
             return False
 
-    def _attempt_decryption(self, packet, topic: str) -> bool:
-        """Try all available keys to decrypt a packet.
+    @property
+    def keys(self) -> List[Tuple[str, str]]:
+        """Configured keys as (name, base64 key) pairs, in the order they are tried."""
+        names, key_bytes = self._key_table
+        return [(name, base64.b64encode(key).decode()) for name, key in zip(names, key_bytes)]
+
+    def _promote_key(self, key_name: str):
+        """Move the key that last decrypted a packet to the front of the key table.
+
+        Traffic on a feed is usually dominated by one channel, so the key that
+        worked for the previous packet is the most likely to work for the next.
+        The table is replaced rather than mutated so decrypt workers iterating
+        over the old one are unaffected.
+        """
+        names, key_bytes = self._key_table
+        index = names.index(key_name)
+        if index:
+            order = (index,) + tuple(i for i in range(len(names)) if i != index)
+            self._key_table = (tuple(names[i] for i in order), tuple(key_bytes[i] for i in order))
+
+    def _decrypt(self, packet, topic: str) -> Optional[str]:
+        """Try all available keys to decrypt a packet in place.
 
         Strategy (matching mesh-mqtt-pg-collector/malla):
         1. Try each key with no channel derivation (primary channel).
         2. Try each key with channel name derivation (from topic).
+
+        Returns the name of the key that worked, or None. Only the packet
+        is modified, so this is safe to run on a decrypt worker.
         """
+        # Nothing to decrypt? (decoded and encrypted share a oneof, so this
+        # also covers packets that are already decoded)
+        encrypted_payload = packet.encrypted
+        if not encrypted_payload:
+            return None
+        # A Data message needs at least the portnum tag and its value; shorter
+        # payloads cannot decrypt to anything, so skip the AES work for every key
+        if len(encrypted_payload) < MIN_DATA_LENGTH:
+            return None
+
         channel_name = self._extract_channel_name_from_topic(topic)
+        # The nonce only depends on the packet, so build it once for all keys
+        nonce = _pack_nonce(packet.id, _get_from(packet))
+        names, key_bytes = self._key_table
 
         # Phase 1: try each key with no derivation (primary/preset channels)
-        for key_name, key_b64 in self.keys:
-            if self._try_decrypt_with_key(packet, key_b64, channel_name=""):
-                self.stats['decrypted'] += 1
-                logger.debug(f"Decrypted with key '{key_name}' (no derivation)")
-                return True
+        for i, key in enumerate(key_bytes):
+            if self._try_decrypt_with_key(packet, encrypted_payload, nonce, key):
+                logger.debug("Decrypted with key '%s' (no derivation)", names[i])
+                return names[i]
 
         # Phase 2: try each key with channel name derivation
         if channel_name:
-            for key_name, key_b64 in self.keys:
-                if self._try_decrypt_with_key(packet, key_b64, channel_name=channel_name):
-                    self.stats['decrypted'] += 1
-                    logger.debug(f"Decrypted with key '{key_name}' (derived from '{channel_name}')")
-                    return True
-
-        self.stats['decryption_failed'] += 1
-        logger.debug(f"Failed to decrypt packet with any available key")
-        return False
+            for i, key in enumerate(key_bytes):
+                if self._try_decrypt_with_key(packet, encrypted_payload, nonce, self._get_key(key, channel_name)):
+                    logger.debug("Decrypted with key '%s' (derived from '%s')", names[i], channel_name)
+                    return names[i]
+
+        return None
+
+    def _record_decryption(self, key_name: Optional[str]) -> bool:
+        """Update statistics and key order after a decryption attempt."""
+        if key_name is None:
+            self._stats[STAT_DECRYPTION_FAILED] += 1
+            logger.debug("Failed to decrypt packet with any available key")
+            return False
+        self._stats[STAT_DECRYPTED] += 1
+        self._promote_key(key_name)
+        return True
+
+    def _attempt_decryption(self, packet, topic: str) -> bool:
+        """Try all available keys to decrypt a packet, recording the outcome."""
+        return self._record_decryption(self._decrypt(packet, topic))
 
     def _log_rejected_packet(self, reason: str, envelope: mqtt_pb2.ServiceEnvelope, packet, topic: str):
         """Log details of rejected packets to file"""
         if not self.reject_logger:
             return
 
-        from_id = getattr(packet, 'from', 0)
-        to_id = getattr(packet, 'to', 0)
+        from_id = _get_from(packet)
+        to_id = packet.to
 
         # Build log entry
         log_parts = [
@@ -353,25 +611,26 @@ class MeshtasticMQTTFilter:
 
         # Add decoded information if available
         if packet.HasField('decoded'):
-            portnum_name = portnums_pb2.PortNum.Name(packet.decoded.portnum) if packet.decoded.portnum else "UNKNOWN"
+            decoded = packet.decoded
+            portnum_name = portnums_pb2.PortNum.Name(decoded.portnum) if decoded.portnum else "UNKNOWN"
             log_parts.append(f"PortNum: {portnum_name}")
 
-            if packet.decoded.HasField('bitfield'):
-                log_parts.append(f"Bitfield: 0x{packet.decoded.bitfield:02x}")
+            if decoded.HasField('bitfield'):
+                log_parts.append(f"Bitfield: 0x{decoded.bitfield:02x}")
 
             # Try to extract text payload
-            if packet.decoded.portnum == portnums_pb2.PortNum.TEXT_MESSAGE_APP:
+            if decoded.portnum == portnums_pb2.PortNum.TEXT_MESSAGE_APP:
                 try:
-                    text = packet.decoded.payload.decode('utf-8')
+                    text = decoded.payload.decode('utf-8')
                     log_parts.append(f"Text: {text}")
                 except:
                     pass
 
             # Try to extract telemetry data
-            if packet.decoded.portnum == portnums_pb2.PortNum.TELEMETRY_APP:
+            if decoded.portnum == portnums_pb2.PortNum.TELEMETRY_APP:
                 try:
                     telemetry = telemetry_pb2.Telemetry()
-                    telemetry.ParseFromString(packet.decoded.payload)
+                    telemetry.ParseFromString(decoded.payload)
                     log_parts.append(f"Telemetry: {telemetry}")
                 except:
                     pass
@@ -387,34 +646,39 @@ class MeshtasticMQTTFilter:
         Returns:
             True if message should be forwarded, False otherwise
         """
-        from_id = getattr(packet, 'from', 0)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        from_id = _get_from(packet) if debug else 0
+
+        decoded = packet.decoded
 
         # Check if the packet has decoded data (portnum UNKNOWN_APP means still encrypted)
-        if packet.decoded.portnum == portnums_pb2.PortNum.UNKNOWN_APP:
-            self.stats['rejected_encrypted'] += 1
-            logger.debug(f"REJECT 0x{from_id:08x}: encrypted")
+        if decoded.portnum == portnums_pb2.PortNum.UNKNOWN_APP:
+            self._stats[STAT_REJECTED_ENCRYPTED] += 1
+            if debug:
+                logger.debug(f"REJECT 0x{from_id:08x}: encrypted")
             self._log_rejected_packet("Still encrypted after decryption attempts", envelope, packet, topic)
             return False
 
         # Check the bitfield in the decoded data
-        # Bit 0 (0x01) indicates "ok to MQTT"
-        if packet.decoded.HasField('bitfield'):
-            is_ok = bool(packet.decoded.bitfield & 0x01)
-            if not is_ok:
-                self.stats['rejected_bitfield_disabled'] += 1
-                logger.debug(f"REJECT 0x{from_id:08x}: bitfield disabled")
-                self._log_rejected_packet("Bitfield bit 0 (Ok to MQTT) not set", envelope, packet, topic)
-            return is_ok
-        else:
-            # No bitfield set - behavior depends on allow_no_bitfield flag
-            if self.allow_no_bitfield:
-                logger.debug(f"ALLOW 0x{from_id:08x}: no bitfield (allow_no_bitfield=True)")
-                return True
-            else:
-                self.stats['rejected_no_bitfield'] += 1
-                logger.debug(f"REJECT 0x{from_id:08x}: no bitfield")
-                self._log_rejected_packet("No bitfield present (firmware < 2.5)", envelope, packet, topic)
-                return False
+        # Bit 0 (0x01) indicates "ok to MQTT"; an unset bitfield reads as 0
+        forward, stat, reason, label = self._bitfield_outcomes[
+            (decoded.HasField('bitfield') << 1) | (decoded.bitfield & 0x01)
+        ]
+        if forward:
+            if debug and label:
+                logger.debug(f"ALLOW 0x{from_id:08x}: {label}")
+            return True
+        self._stats[stat] += 1
+        if debug:
+            logger.debug(f"REJECT 0x{from_id:08x}: {label}")
+        self._log_rejected_packet(reason, envelope, packet, topic)
+        return False
+
+    def _stop_decrypt_pool(self):
+        """Wait for queued decrypt jobs to finish and stop the worker threads"""
+        if self._decrypt_pool is not None:
+            self._decrypt_pool.shutdown(wait=True)
+            self._decrypt_pool = None
 
     def start(self):
         """Start the MQTT filter service"""
@@ -425,6 +689,7 @@ class MeshtasticMQTTFilter:
             self.client.loop_forever()
         except KeyboardInterrupt:
             logger.info("Shutting down...")
+            self._stop_decrypt_pool()
             self.client.disconnect()
         except Exception as e:
             logger.error(f"Error: {e}", exc_info=True)
@@ -505,6 +770,13 @@ def main():
         action='store_true',
         help='Allow packets without bitfield (for older firmware or backwards compatibility)'
     )
+    parser.add_argument(
+        '--decrypt-workers',
+        type=int,
+        default=0,
+        help='Decrypt packets on this many worker threads instead of the MQTT network thread; '
+             'messages may then be published out of order (default: 0, disabled)'
+    )
     args = parser.parse_args()
 
     if args.debug:
@@ -562,7 +834,8 @@ def main():
         decrypt_default=not args.no_decrypt_default,
         channel_keys=args.channel_keys,
         reject_log_file=args.reject_log_file,
-        allow_no_bitfield=args.allow_no_bitfield
+        allow_no_bitfield=args.allow_no_bitfield,
+        decrypt_workers=args.decrypt_workers
     )
 
     filter_service.start()
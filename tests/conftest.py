@@ -1,8 +1,76 @@
 """Pytest configuration and shared fixtures"""
 import base64
 import pytest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 from meshtastic.protobuf import mesh_pb2, mqtt_pb2
+# Imported before any test patches mqtt_filter.mqtt.Client, for mock specs
+from paho.mqtt.client import Client as PahoClient
+
+
+# Connection settings shared by tests that don't care about them
+FILTER_DEFAULTS = {
+    "broker": "test.mqtt.com",
+    "port": 1883,
+    "input_topic": "msh/test/#",
+    "output_topic": "filtered/test",
+}
+
+
+class FakeClient:
+    """No-op MQTT client for tests that never assert on client calls"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+# Import inside fixture to avoid coverage warning
+@pytest.fixture(scope="session")
+def mqtt_filter_class():
+    """Import MeshtasticMQTTFilter class"""
+    from mqtt_filter import MeshtasticMQTTFilter
+    return MeshtasticMQTTFilter
+
+
+def _new_fake_client(*args, **kwargs):
+    """Give each filter its own FakeClient so bound callbacks don't pile up"""
+    return FakeClient()
+
+
+@pytest.fixture(scope="module")
+def mock_client_class():
+    """Patch mqtt.Client once for the whole test module"""
+    with patch('mqtt_filter.mqtt.Client') as client_class:
+        client_class.side_effect = _new_fake_client
+        yield client_class
+
+
+@pytest.fixture(scope="module")
+def shared_mock_client():
+    """Create one mock client for the whole test module"""
+    return MagicMock(spec=PahoClient)
+
+
+@pytest.fixture
+def mock_client(mock_client_class, shared_mock_client):
+    """Have the patched mqtt.Client return the module's mock client for this test
+
+    Only tests that assert on client calls need this; the call history is
+    cleared afterwards.
+    """
+    mock_client_class.side_effect = None
+    mock_client_class.return_value = shared_mock_client
+    yield shared_mock_client
+    mock_client_class.side_effect = _new_fake_client
+    shared_mock_client.reset_mock()
+    mock_client_class.reset_mock()
+
+
+@pytest.fixture
+def filter_factory(mqtt_filter_class, mock_client_class):
+    """Return a function that builds a filter from FILTER_DEFAULTS plus overrides"""
+    def make_filter(**kwargs):
+        return mqtt_filter_class(**{**FILTER_DEFAULTS, **kwargs})
+    return make_filter
 
 
 @pytest.fixture
@@ -21,11 +89,7 @@ def mock_mqtt_client():
 @pytest.fixture
 def sample_mesh_packet():
     """Create a sample MeshPacket with decoded data"""
-    packet = mesh_pb2.MeshPacket()
-    packet.id = 123456
-    packet.channel = 0
-    setattr(packet, 'from', 0x12345678)
-    setattr(packet, 'to', 0xFFFFFFFF)
+    packet = mesh_pb2.MeshPacket(id=123456, channel=0, **{'from': 0x12345678, 'to': 0xFFFFFFFF})
 
     # Add decoded data with bitfield
     packet.decoded.portnum = 1  # TEXT_MESSAGE_APP
@@ -38,11 +102,7 @@ def sample_mesh_packet():
 @pytest.fixture
 def sample_encrypted_packet():
     """Create a sample encrypted MeshPacket"""
-    packet = mesh_pb2.MeshPacket()
-    packet.id = 123456
-    packet.channel = 0
-    setattr(packet, 'from', 0x12345678)
-    setattr(packet, 'to', 0xFFFFFFFF)
+    packet = mesh_pb2.MeshPacket(id=123456, channel=0, **{'from': 0x12345678, 'to': 0xFFFFFFFF})
 
     # Add encrypted data (not decoded)
     packet.encrypted = b"\x01\x02\x03\x04\x05"  # Dummy encrypted data
@@ -1,48 +1,44 @@
 """Integration tests for message processing pipeline"""
-import pytest
-from unittest.mock import Mock, patch, MagicMock, call
-import base64
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import logging
+from unittest.mock import Mock
 
 from meshtastic.protobuf import mesh_pb2, mqtt_pb2
 
+MeshPacket = mesh_pb2.MeshPacket
+ServiceEnvelope = mqtt_pb2.ServiceEnvelope
+
+
+def _envelope_payload(**decoded):
+    """Serialize a ServiceEnvelope around a packet from 0x12345678"""
+    packet = MeshPacket(**{'from': 0x12345678})
+    if decoded:
+        packet.decoded.CopyFrom(mesh_pb2.Data(**decoded))
+    else:
+        packet.encrypted = b"\x01\x02\x03"
+    return ServiceEnvelope(packet=packet).SerializeToString()
 
-# Import inside fixture to avoid coverage warning
-@pytest.fixture
-def mqtt_filter_class():
-    """Import MeshtasticMQTTFilter class"""
-    from mqtt_filter import MeshtasticMQTTFilter
-    return MeshtasticMQTTFilter
+
+# MQTT payloads for tests that only feed packets through on_message,
+# serialized once at import
+_BITFIELD_ON_PAYLOAD = _envelope_payload(portnum=1, bitfield=0x01)
+_BITFIELD_OFF_PAYLOAD = _envelope_payload(portnum=1, bitfield=0x00)
+_NO_BITFIELD_PAYLOAD = _envelope_payload(portnum=1)
+_ENCRYPTED_PAYLOAD = _envelope_payload()
 
 
 class TestMessageProcessing:
     """Test end-to-end message processing"""
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_forward_valid_message(self, mock_client_class, mqtt_filter_class):
+    def test_forward_valid_message(self, mock_client, filter_factory):
         """Test forwarding a valid message with Ok to MQTT bitfield"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
 
         # Create a valid ServiceEnvelope with Ok to MQTT bitfield
-        envelope = mqtt_pb2.ServiceEnvelope()
+        envelope = ServiceEnvelope()
         envelope.channel_id = "LongFast"
         envelope.gateway_id = "!87654321"
 
-        packet = mesh_pb2.MeshPacket()
-        packet.id = 123456
-        setattr(packet, 'from', 0x12345678)
-        setattr(packet, 'to', 0xFFFFFFFF)
+        packet = MeshPacket(id=123456, **{'from': 0x12345678, 'to': 0xFFFFFFFF})
         packet.decoded.portnum = 1
         packet.decoded.payload = b"Test message"
         packet.decoded.bitfield = 0x01  # Ok to MQTT enabled
@@ -63,31 +59,13 @@ class TestMessageProcessing:
         assert call_args[0][0] == "filtered/test/2/e/LongFast/!12345678"
         assert filter_service.stats['forwarded'] == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_reject_message_no_bitfield(self, mock_client_class, mqtt_filter_class):
+    def test_reject_message_no_bitfield(self, mock_client, filter_factory):
         """Test rejecting a message without Ok to MQTT bitfield"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
-
-        # Create envelope without bitfield
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        packet.decoded.bitfield = 0x00  # Ok to MQTT disabled
-
-        envelope.packet.CopyFrom(packet)
+        filter_service = filter_factory()
 
         mock_msg = Mock()
         mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
-        mock_msg.payload = envelope.SerializeToString()
+        mock_msg.payload = _BITFIELD_OFF_PAYLOAD  # Ok to MQTT disabled
 
         filter_service.on_message(mock_client, None, mock_msg)
 
@@ -95,30 +73,31 @@ class TestMessageProcessing:
         assert not mock_client.publish.called
         assert filter_service.stats['rejected_bitfield_disabled'] == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_topic_mapping(self, mock_client_class, mqtt_filter_class):
-        """Test that input topic prefix is correctly replaced with output prefix"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/US/NY/#",
-            output_topic="filtered/msh/US/NY"
-        )
-
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        packet.decoded.bitfield = 0x01
+    def test_missing_bitfield_respects_allow_flag(self, mock_client, filter_factory):
+        """Test messages without a bitfield are dropped unless allow_no_bitfield is set"""
+        mock_msg = Mock()
+        mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
+        mock_msg.payload = _NO_BITFIELD_PAYLOAD
 
-        envelope.packet.CopyFrom(packet)
+        strict_filter = filter_factory()
+        strict_filter.on_message(mock_client, None, mock_msg)
+
+        assert not mock_client.publish.called
+        assert strict_filter.stats['rejected_no_bitfield'] == 1
+
+        permissive_filter = filter_factory(allow_no_bitfield=True)
+        permissive_filter.on_message(mock_client, None, mock_msg)
+
+        assert mock_client.publish.called
+        assert permissive_filter.stats['forwarded'] == 1
+
+    def test_topic_mapping(self, mock_client, filter_factory):
+        """Test that input topic prefix is correctly replaced with output prefix"""
+        filter_service = filter_factory(input_topic="msh/US/NY/#", output_topic="filtered/msh/US/NY")
 
         mock_msg = Mock()
         mock_msg.topic = "msh/US/NY/2/e/LongFast/!12345678"
-        mock_msg.payload = envelope.SerializeToString()
+        mock_msg.payload = _BITFIELD_ON_PAYLOAD
 
         filter_service.on_message(mock_client, None, mock_msg)
 
@@ -126,18 +105,24 @@ class TestMessageProcessing:
         call_args = mock_client.publish.call_args
         assert call_args[0][0] == "filtered/msh/US/NY/2/e/LongFast/!12345678"
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_statistics_tracking(self, mock_client_class, mqtt_filter_class):
-        """Test that statistics are tracked correctly during processing"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
+    def test_topic_mapping_only_replaces_prefix(self, mock_client, filter_factory):
+        """Test that only a leading input prefix is rewritten"""
+        filter_service = filter_factory(input_topic="msh/US/#", output_topic="filtered")
+
+        mock_msg = Mock()
+        mock_msg.topic = "other/msh/US/2/e/LongFast/!12345678"
+        mock_msg.payload = _BITFIELD_ON_PAYLOAD
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service.on_message(mock_client, None, mock_msg)
+
+        # Topic outside the input prefix is published unchanged
+        call_args = mock_client.publish.call_args
+        assert call_args[0][0] == "other/msh/US/2/e/LongFast/!12345678"
+
+    def test_statistics_tracking(self, filter_factory):
+        """Test that statistics are tracked correctly during processing"""
+        filter_service = filter_factory()
+        client = filter_service.client
 
         # Process multiple messages with different outcomes
         messages = [
@@ -152,9 +137,8 @@ class TestMessageProcessing:
         ]
 
         for from_id, bitfield, should_forward in messages:
-            envelope = mqtt_pb2.ServiceEnvelope()
-            packet = mesh_pb2.MeshPacket()
-            setattr(packet, 'from', from_id)
+            envelope = ServiceEnvelope()
+            packet = MeshPacket(**{'from': from_id})
             packet.decoded.portnum = 1
             packet.decoded.bitfield = bitfield
 
@@ -164,29 +148,39 @@ class TestMessageProcessing:
             mock_msg.topic = f"msh/test/!{from_id:08x}"
             mock_msg.payload = envelope.SerializeToString()
 
-            filter_service.on_message(mock_client, None, mock_msg)
+            filter_service.on_message(client, None, mock_msg)
 
         # Verify statistics
         assert filter_service.stats['total'] == 4
         assert filter_service.stats['forwarded'] == 2
         assert filter_service.stats['rejected_bitfield_disabled'] == 2
 
+    def test_debug_logging(self, filter_factory, caplog):
+        """Test that per-message debug details are logged only at DEBUG level"""
+        filter_service = filter_factory()
+        client = filter_service.client
+
+        mock_msg = Mock()
+        mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
+        mock_msg.payload = _ENCRYPTED_PAYLOAD
+
+        with caplog.at_level(logging.INFO, logger='mqtt_filter'):
+            filter_service.on_message(client, None, mock_msg)
+        assert "Message #1" not in caplog.text
+
+        with caplog.at_level(logging.DEBUG, logger='mqtt_filter'):
+            filter_service.on_message(client, None, mock_msg)
+        assert "Message #2" in caplog.text
+        assert "REJECT 0x12345678: encrypted" in caplog.text
+        assert "Error processing message" not in caplog.text
+
 
 class TestConnectionHandling:
     """Test MQTT connection handling"""
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_on_connect_success(self, mock_client_class, mqtt_filter_class):
+    def test_on_connect_success(self, mock_client, filter_factory):
         """Test successful MQTT connection"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
 
         # Simulate successful connection
         filter_service.on_connect(mock_client, None, None, 0)
@@ -194,18 +188,9 @@ class TestConnectionHandling:
         # Verify subscription
         mock_client.subscribe.assert_called_once_with("msh/test/#")
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_on_connect_failure(self, mock_client_class, mqtt_filter_class):
+    def test_on_connect_failure(self, mock_client, filter_factory):
         """Test failed MQTT connection"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
 
         # Simulate failed connection (rc != 0)
         filter_service.on_connect(mock_client, None, None, 5)
@@ -213,22 +198,14 @@ class TestConnectionHandling:
         # Verify no subscription was made
         assert not mock_client.subscribe.called
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_on_disconnect(self, mock_client_class, mqtt_filter_class):
+    def test_on_disconnect(self, filter_factory):
         """Test handling of disconnect"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
+        client = filter_service.client
 
         # Test both expected (rc=0) and unexpected (rc!=0) disconnects
-        filter_service.on_disconnect(mock_client, None, 0)
-        filter_service.on_disconnect(mock_client, None, 1)
+        filter_service.on_disconnect(client, None, 0)
+        filter_service.on_disconnect(client, None, 1)
 
         # Should not raise exceptions
 
@@ -236,18 +213,9 @@ class TestConnectionHandling:
 class TestErrorHandling:
     """Test error handling in message processing"""
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_malformed_protobuf(self, mock_client_class, mqtt_filter_class):
+    def test_malformed_protobuf(self, mock_client, filter_factory):
         """Test handling of malformed protobuf message"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
 
         mock_msg = Mock()
         mock_msg.topic = "msh/test/invalid"
@@ -1,303 +1,334 @@
 """Tests for MeshtasticMQTTFilter core functionality"""
+import hashlib
+import logging
+import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-import base64
-import sys
-import os
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from meshtastic.protobuf import mesh_pb2, mqtt_pb2
 
+MeshPacket = mesh_pb2.MeshPacket
+ServiceEnvelope = mqtt_pb2.ServiceEnvelope
 
-# Import inside fixture to avoid coverage warning
-@pytest.fixture
-def mqtt_filter_class():
-    """Import MeshtasticMQTTFilter class"""
-    from mqtt_filter import MeshtasticMQTTFilter
-    return MeshtasticMQTTFilter
+# Custom channel key used by the key configuration and decryption tests
+_CUSTOM_KEY = b"0123456789abcdef"
+_CUSTOM_KEY_B64 = "MDEyMzQ1Njc4OWFiY2RlZg=="  # base64 of _CUSTOM_KEY
 
 
 class TestMeshtasticMQTTFilterInit:
     """Test initialization and configuration"""
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_basic_initialization(self, mock_client_class, mqtt_filter_class):
+    def test_basic_initialization(self, filter_factory):
         """Test basic filter initialization"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        filter_service = filter_factory()
 
         assert filter_service.broker == "test.mqtt.com"
         assert filter_service.port == 1883
         assert filter_service.input_topic == "msh/test/#"
         assert filter_service.output_topic == "filtered/test"
         assert filter_service.show_stats is False
-        assert len(filter_service.keys) == 1  # Default key
+        assert {name for name, _ in filter_service.keys} == {'default'}
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_initialization_with_credentials(self, mock_client_class, mqtt_filter_class):
+    def test_initialization_with_credentials(self, filter_factory, mock_client):
         """Test initialization with MQTT credentials"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            username="testuser",
-            password="testpass"
-        )
+        filter_service = filter_factory(username="testuser", password="testpass")
 
         mock_client.username_pw_set.assert_called_once_with("testuser", "testpass")
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_no_default_key(self, mock_client_class, mqtt_filter_class):
-        """Test disabling default LongFast key"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            decrypt_default=False
-        )
+def _make_packet(from_id, portnum=None, bitfield=None, encrypted=None, packet_id=0):
+    """Build a MeshPacket from the given sender with the given fields set"""
+    # 'from' is a Python keyword, so it is passed to the constructor by dict
+    packet = MeshPacket(id=packet_id, **{'from': from_id})
+    if portnum is not None:
+        packet.decoded.portnum = portnum
+    if bitfield is not None:
+        packet.decoded.bitfield = bitfield
+    if encrypted is not None:
+        packet.encrypted = encrypted
+    return packet
 
-        assert len(filter_service.keys) == 0
+
+# Canonical packets for the _check_ok_to_mqtt cases, serialized once at import
+_PKT_BITFIELD_ON_BYTES = _make_packet(0x12345678, portnum=1, bitfield=0x01).SerializeToString()
+_PKT_BITFIELD_OFF_BYTES = _make_packet(0x12345678, portnum=1, bitfield=0x00).SerializeToString()
+_PKT_NO_BITFIELD_BYTES = _make_packet(0x12345678, portnum=1).SerializeToString()
+_PKT_ENCRYPTED_BYTES = _make_packet(0x12345678, encrypted=b"\x01\x02\x03").SerializeToString()
+
+
+@pytest.fixture(scope="module")
+def envelope():
+    """Empty ServiceEnvelope; _check_ok_to_mqtt only reads it"""
+    return ServiceEnvelope()
 
 
 class TestCheckOkToMQTT:
     """Test the _check_ok_to_mqtt method"""
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_packet_with_ok_to_mqtt_bitfield(self, mock_client_class, mqtt_filter_class):
-        """Test packet with Ok to MQTT bitfield set"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
-
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        packet.decoded.bitfield = 0x01  # Ok to MQTT enabled
+    @pytest.mark.parametrize("ctor_kwargs,packet_bytes,expected_result,expected_stat_key", [
+        # Ok to MQTT enabled
+        ({}, _PKT_BITFIELD_ON_BYTES, True, None),
+        # Ok to MQTT disabled
+        ({}, _PKT_BITFIELD_OFF_BYTES, False, 'rejected_bitfield_disabled'),
+        # Encrypted packet (no decoded data)
+        ({}, _PKT_ENCRYPTED_BYTES, False, 'rejected_encrypted'),
+        # No bitfield, allowed
+        ({"allow_no_bitfield": True}, _PKT_NO_BITFIELD_BYTES, True, None),
+        # No bitfield, not allowed
+        ({"allow_no_bitfield": False}, _PKT_NO_BITFIELD_BYTES, False, 'rejected_no_bitfield'),
+    ])
+    def test_check_ok_to_mqtt(self, filter_factory, envelope, ctor_kwargs, packet_bytes,
+                              expected_result, expected_stat_key):
+        """Test the forwarding decision and rejection counter for each packet shape"""
+        filter_service = filter_factory(**ctor_kwargs)
+        packet = MeshPacket.FromString(packet_bytes)
 
         result = filter_service._check_ok_to_mqtt(envelope, packet)
 
-        assert result is True
+        assert result is expected_result
+        if expected_stat_key is not None:
+            assert filter_service.stats[expected_stat_key] == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_packet_without_ok_to_mqtt_bitfield(self, mock_client_class, mqtt_filter_class):
-        """Test packet without Ok to MQTT bitfield set"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
-
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        packet.decoded.bitfield = 0x00  # Ok to MQTT disabled
 
-        result = filter_service._check_ok_to_mqtt(envelope, packet)
+class TestStatistics:
+    """Test statistics tracking"""
+
+    def test_statistics_initialization(self, filter_factory):
+        """Test statistics are initialized correctly"""
+        filter_service = filter_factory()
+
+        assert filter_service.stats == {
+            'total': 0,
+            'forwarded': 0,
+            'rejected_encrypted': 0,
+            'rejected_no_bitfield': 0,
+            'rejected_bitfield_disabled': 0,
+            'decrypted': 0,
+            'decryption_failed': 0,
+        }
+
+
+class TestCustomEncryptionKeys:
+    """Test custom encryption key handling"""
+
+    @pytest.mark.parametrize("kwargs,expected_names", [
+        # Default LongFast key only
+        ({}, {'default'}),
+        # Default key disabled
+        ({"decrypt_default": False}, set()),
+        # Default key + custom key
+        ({"channel_keys": [_CUSTOM_KEY_B64]}, {'default', 'custom-0'}),
+        # Invalid custom key is skipped
+        ({"channel_keys": ["invalid-base64!@#"]}, {'default'}),
+    ])
+    def test_configured_keys(self, filter_factory, kwargs, expected_names):
+        """Test which keys are loaded for each key configuration"""
+        filter_service = filter_factory(**kwargs)
+
+        assert {name for name, _ in filter_service.keys} == expected_names
+
+
+@pytest.fixture(scope="module")
+def reject_log_path(tmp_path_factory):
+    """Reject log file shared by the tests in this module"""
+    return tmp_path_factory.mktemp("reject") / "rejected.log"
+
+
+class TestRejectLogging:
+    """Test rejection logging functionality"""
+
+    def test_reject_logger_initialization(self, filter_factory, reject_log_path):
+        """Test reject logger is initialized when file is specified"""
+        filter_service = filter_factory(reject_log_file=str(reject_log_path))
+
+        assert filter_service.reject_logger is not None
+
+    def test_no_reject_logger_without_file(self, filter_factory):
+        """Test reject logger is not initialized without file"""
+        filter_service = filter_factory()
+
+        assert filter_service.reject_logger is None
+
+    def test_rejected_packet_is_logged(self, filter_factory, mock_client, reject_log_path):
+        """Test rejected packets are written to the reject log"""
+        filter_service = filter_factory(reject_log_file=str(reject_log_path))
+
+        mock_msg = Mock()
+        mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
+        mock_msg.payload = ServiceEnvelope(packet=MeshPacket.FromString(_PKT_BITFIELD_OFF_BYTES)).SerializeToString()
+
+        filter_service.on_message(mock_client, None, mock_msg)
 
-        assert result is False
         assert filter_service.stats['rejected_bitfield_disabled'] == 1
+        assert "Bitfield bit 0 (Ok to MQTT) not set" in reject_log_path.read_text()
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_encrypted_packet_rejected(self, mock_client_class, mqtt_filter_class):
-        """Test encrypted packet (no decoded data) is rejected"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+# Decrypted contents used by the decryption tests
+_HELLO_DATA = mesh_pb2.Data(portnum=1, payload=b"Hello")
+_HELLO_DATA_OK_TO_MQTT = mesh_pb2.Data(portnum=1, payload=b"Hello", bitfield=0x01)
 
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.encrypted = b"\x01\x02\x03"
 
-        result = filter_service._check_ok_to_mqtt(envelope, packet)
+def _encrypt_data(data, packet_id, sender_id, key):
+    """Encrypt a Data message the way Meshtastic firmware does (AES-CTR)"""
+    nonce = packet_id.to_bytes(8, 'little') + sender_id.to_bytes(8, 'little')
+    encryptor = Cipher(algorithms.AES(key), modes.CTR(nonce)).encryptor()
+    return encryptor.update(data.SerializeToString()) + encryptor.finalize()
 
-        assert result is False
-        assert filter_service.stats['rejected_encrypted'] == 1
-
-    @patch('mqtt_filter.mqtt.Client')
-    def test_no_bitfield_with_allow_flag(self, mock_client_class, mqtt_filter_class):
-        """Test packet without bitfield when allow_no_bitfield is True"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            allow_no_bitfield=True
-        )
-
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        # No bitfield set
 
-        result = filter_service._check_ok_to_mqtt(envelope, packet)
+class TestDecryption:
+    """Test packet decryption"""
+
+    def test_decrypt_default_key(self, filter_factory, default_longfast_key):
+        """Test decrypting a packet encrypted with the default LongFast key"""
+        filter_service = filter_factory()
+
+        encrypted = _encrypt_data(_HELLO_DATA_OK_TO_MQTT, 123456, 0x12345678, default_longfast_key)
+        packet = _make_packet(0x12345678, encrypted=encrypted, packet_id=123456)
+
+        result = filter_service._attempt_decryption(packet, "msh/test/2/e/LongFast/!12345678")
 
         assert result is True
+        assert packet.decoded.payload == b"Hello"
+        assert packet.decoded.bitfield == 0x01
+        assert filter_service.stats['decrypted'] == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_no_bitfield_without_allow_flag(self, mock_client_class, mqtt_filter_class):
-        """Test packet without bitfield when allow_no_bitfield is False"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            allow_no_bitfield=False
-        )
-
-        envelope = mqtt_pb2.ServiceEnvelope()
-        packet = mesh_pb2.MeshPacket()
-        setattr(packet, 'from', 0x12345678)
-        packet.decoded.portnum = 1
-        # No bitfield set
+    def test_decrypt_derived_key_is_cached(self, filter_factory, default_longfast_key):
+        """Test that channel-derived keys are computed once and reused"""
+        filter_service = filter_factory()
 
-        result = filter_service._check_ok_to_mqtt(envelope, packet)
+        derived_key = hashlib.sha256(default_longfast_key + b"Private").digest()
 
-        assert result is False
-        assert filter_service.stats['rejected_no_bitfield'] == 1
+        with patch.object(filter_service, '_derive_key', wraps=filter_service._derive_key) as derive:
+            for packet_id in (1, 2):
+                encrypted = _encrypt_data(_HELLO_DATA, packet_id, 0x12345678, derived_key)
+                packet = _make_packet(0x12345678, encrypted=encrypted, packet_id=packet_id)
 
+                assert filter_service._attempt_decryption(packet, "msh/test/2/e/Private/!12345678")
+                assert packet.decoded.payload == b"Hello"
 
-class TestStatistics:
-    """Test statistics tracking"""
+            # Raw keys are used as-is; only the channel-derived key is computed
+            assert derive.call_count == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_statistics_initialization(self, mock_client_class, mqtt_filter_class):
-        """Test statistics are initialized correctly"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
+    def test_decrypt_wrong_key_fails(self, filter_factory):
+        """Test that a packet encrypted with an unknown key stays encrypted"""
+        filter_service = filter_factory()
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+        encrypted = _encrypt_data(_HELLO_DATA, 123456, 0x12345678, b"\x42" * 16)
+        packet = _make_packet(0x12345678, encrypted=encrypted, packet_id=123456)
 
-        assert filter_service.stats['total'] == 0
-        assert filter_service.stats['forwarded'] == 0
-        assert filter_service.stats['rejected_encrypted'] == 0
-        assert filter_service.stats['rejected_no_bitfield'] == 0
-        assert filter_service.stats['rejected_bitfield_disabled'] == 0
-        assert filter_service.stats['decrypted'] == 0
-        assert filter_service.stats['decryption_failed'] == 0
+        result = filter_service._attempt_decryption(packet, "msh/test/2/e/LongFast/!12345678")
 
+        assert result is False
+        assert packet.decoded.portnum == 0
+        assert filter_service.stats['decryption_failed'] == 1
 
-class TestCustomEncryptionKeys:
-    """Test custom encryption key handling"""
+    def test_decrypt_short_payload_skips_keys(self, filter_factory):
+        """Test that a payload too short to hold a Data message is not tried against any key"""
+        filter_service = filter_factory()
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_add_custom_keys(self, mock_client_class, mqtt_filter_class):
-        """Test adding custom encryption keys"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        custom_key = base64.b64encode(b"0123456789abcdef").decode()
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            channel_keys=[custom_key]
-        )
-
-        # Should have default key + custom key
-        assert len(filter_service.keys) == 2
-        assert filter_service.keys[0][0] == 'default'
-        assert filter_service.keys[1][0] == 'custom-0'
-
-    @patch('mqtt_filter.mqtt.Client')
-    def test_invalid_custom_key(self, mock_client_class, mqtt_filter_class):
-        """Test handling of invalid custom key"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            channel_keys=["invalid-base64!@#"]
-        )
-
-        # Should only have default key
-        assert len(filter_service.keys) == 1
+        packet = _make_packet(0x12345678, encrypted=b"\x42", packet_id=123456)
 
+        with patch.object(filter_service, '_try_decrypt_with_key') as try_key:
+            result = filter_service._attempt_decryption(packet, "msh/test/2/e/Private/!12345678")
 
-class TestRejectLogging:
-    """Test rejection logging functionality"""
+        assert result is False
+        try_key.assert_not_called()
+        assert filter_service.stats['decryption_failed'] == 1
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_reject_logger_initialization(self, mock_client_class, mqtt_filter_class, tmp_path):
-        """Test reject logger is initialized when file is specified"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
+    def test_successful_key_moves_to_front(self, filter_factory):
+        """Test the key that decrypted the last packet is tried first next time"""
+        filter_service = filter_factory(channel_keys=[_CUSTOM_KEY_B64])
 
-        log_file = tmp_path / "rejected.log"
+        encrypted = _encrypt_data(_HELLO_DATA, 123456, 0x12345678, _CUSTOM_KEY)
+        packet = _make_packet(0x12345678, encrypted=encrypted, packet_id=123456)
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test",
-            reject_log_file=str(log_file)
-        )
+        assert filter_service._attempt_decryption(packet, "msh/test/2/e/LongFast/!12345678")
+        assert [name for name, _ in filter_service.keys] == ['custom-0', 'default']
 
-        assert filter_service.reject_logger is not None
+    def test_decrypt_workers(self, filter_factory, mock_client, default_longfast_key):
+        """Test encrypted messages are decrypted and forwarded by the worker pool"""
+        filter_service = filter_factory(decrypt_workers=2)
 
-    @patch('mqtt_filter.mqtt.Client')
-    def test_no_reject_logger_without_file(self, mock_client_class, mqtt_filter_class):
-        """Test reject logger is not initialized without file"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
+        for packet_id, bitfield in ((1, 0x01), (2, 0x00), (3, 0x01)):
+            data = mesh_pb2.Data(portnum=1, payload=b"Hello", bitfield=bitfield)
+            encrypted = _encrypt_data(data, packet_id, 0x12345678, default_longfast_key)
+            envelope = ServiceEnvelope(packet=_make_packet(0x12345678, encrypted=encrypted, packet_id=packet_id))
 
-        filter_service = mqtt_filter_class(
-            broker="test.mqtt.com",
-            port=1883,
-            input_topic="msh/test/#",
-            output_topic="filtered/test"
-        )
+            mock_msg = Mock()
+            mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
+            mock_msg.payload = envelope.SerializeToString()
+            filter_service.on_message(mock_client, None, mock_msg)
 
-        assert filter_service.reject_logger is None
+        # Wait for the queued decrypt jobs
+        filter_service._stop_decrypt_pool()
+
+        assert mock_client.publish.call_count == 2
+        assert mock_client.publish.call_args[0][0] == "filtered/test/2/e/LongFast/!12345678"
+        assert filter_service.stats['total'] == 3
+        assert filter_service.stats['decrypted'] == 3
+        assert filter_service.stats['forwarded'] == 2
+        assert filter_service.stats['rejected_bitfield_disabled'] == 1
+
+    def test_decrypt_queue_full_decrypts_inline(self, mqtt_filter_class, filter_factory, mock_client,
+                                                default_longfast_key):
+        """Test messages are decrypted inline once every decrypt slot is taken"""
+        DECRYPT_QUEUE_PER_WORKER = sys.modules[mqtt_filter_class.__module__].DECRYPT_QUEUE_PER_WORKER
+        filter_service = filter_factory(decrypt_workers=1)
+
+        encrypted = _encrypt_data(_HELLO_DATA_OK_TO_MQTT, 1, 0x12345678, default_longfast_key)
+        mock_msg = Mock()
+        mock_msg.topic = "msh/test/2/e/LongFast/!12345678"
+        mock_msg.payload = ServiceEnvelope(
+            packet=_make_packet(0x12345678, encrypted=encrypted, packet_id=1)
+        ).SerializeToString()
+
+        # Simulate a backlog that fills the queue
+        for _ in range(DECRYPT_QUEUE_PER_WORKER):
+            assert filter_service._decrypt_slots.acquire(blocking=False)
+
+        # The inline decryption, like a worker's, must not hold the stats lock
+        decrypt = filter_service._decrypt
+        lock_held = []
+
+        def checked_decrypt(packet, topic):
+            lock_held.append(filter_service._stats_lock.locked())
+            return decrypt(packet, topic)
+
+        with patch.object(filter_service._decrypt_pool, 'submit') as submit, \
+                patch.object(filter_service, '_decrypt', side_effect=checked_decrypt):
+            filter_service.on_message(mock_client, None, mock_msg)
+
+        # Handled on the calling thread, not queued
+        submit.assert_not_called()
+        assert lock_held == [False]
+        assert mock_client.publish.call_count == 1
+        assert filter_service.stats['decrypted'] == 1
+
+        # Once slots free up, jobs go to the pool again and release their slot
+        for _ in range(DECRYPT_QUEUE_PER_WORKER):
+            filter_service._decrypt_slots.release()
+        filter_service.on_message(mock_client, None, mock_msg)
+        filter_service._stop_decrypt_pool()
+
+        assert mock_client.publish.call_count == 2
+        for _ in range(DECRYPT_QUEUE_PER_WORKER):
+            assert filter_service._decrypt_slots.acquire(blocking=False)
+        assert not filter_service._decrypt_slots.acquire(blocking=False)
+
+
+class TestCachedTimeFormatter:
+    """Test the log formatter that caches the formatted time"""
+
+    def test_matches_default_formatter(self, mqtt_filter_class):
+        """Test cached timestamps match logging.Formatter output"""
+        CachedTimeFormatter = sys.modules[mqtt_filter_class.__module__].CachedTimeFormatter
+        fmt = '%(asctime)s - %(levelname)s - %(message)s'
+        cached = CachedTimeFormatter(fmt)
+        default = logging.Formatter(fmt)
+
+        for created in (1700000000.123, 1700000000.987, 1700000001.001, 1700000061.5):
+            record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            assert cached.format(record) == default.format(record)